@@ -1,38 +1,72 @@
+import hashlib
+import logging
+import threading
+import time
 from typing import Any
-import requests
+
+from requests.exceptions import Timeout
 
 from dify_plugin import ToolProvider
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
 
+from tools._http import SESSION, TIMEOUT, auth_headers, json_loads
+
+logger = logging.getLogger(__name__)
+
+_VALIDATION_URL = "https://open.api.tianyancha.com/services/open/ic/baseinfo/normal"
+
+# Seconds a successfully validated token is trusted without another API call
+_VALIDATED_TTL = 600
+
+# Token digest -> monotonic time of its last successful validation
+_validated: dict[str, float] = {}
+_validated_lock = threading.Lock()
+
+
+def _token_digest(token: str) -> str:
+    """Digest used to remember a token without keeping it in memory"""
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
 
 class TianyanchaDifyPluginProvider(ToolProvider):
     def _validate_credentials(self, credentials: dict[str, Any]) -> None:
         try:
             # Get token
             token = credentials.get("token")
-            print(f"token: {token}")
+            logger.debug("token present: %s", bool(token))
             if not token:
                 raise ToolProviderCredentialValidationError("API token cannot be empty")
                 
+            # Skip the API call if this token was validated recently
+            digest = _token_digest(token)
+            with _validated_lock:
+                validated_at = _validated.get(digest)
+            if validated_at is not None and time.monotonic() - validated_at < _VALIDATED_TTL:
+                return
+                
             # Make a simple API call to validate the token
-            url = "http://open.api.tianyancha.com/services/open/ic/baseinfo/normal?keyword=北京百度网讯科技有限公司"
-            headers = {'Authorization': token}
+            params = {"keyword": "北京百度网讯科技有限公司"}
             
-            response = requests.get(url, headers=headers)
+            response = SESSION.get(_VALIDATION_URL, params=params, headers=auth_headers(token), timeout=TIMEOUT)
             
             # Validate response
             if response.status_code != 200:
                 raise ToolProviderCredentialValidationError(f"API validation failed, status code: {response.status_code}")
                 
             # Check API response result
-            response_data = response.json()
+            response_data = json_loads(response.content)
             if response_data.get("error_code") != 0:
                 error_msg = response_data.get("reason", "Unknown error")
                 raise ToolProviderCredentialValidationError(f"API validation failed: {error_msg}")
                 
+            with _validated_lock:
+                _validated[digest] = time.monotonic()
+                
         except ToolProviderCredentialValidationError:
             # Re-raise custom validation errors directly
             raise
+        except Timeout:
+            raise ToolProviderCredentialValidationError("API validation timed out, please try again later")
         except Exception as e:
             # Handle other possible errors
             raise ToolProviderCredentialValidationError(f"Credential validation failed: {str(e)}")
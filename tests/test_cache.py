@@ -0,0 +1,103 @@
+import threading
+import time
+import unittest
+
+from tools._cache import _in_flight, cached
+
+
+def wait_until(condition, timeout: float = 2) -> bool:
+    """Poll condition until it holds or timeout seconds pass"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class CachedKeyTest(unittest.TestCase):
+    def test_omitted_defaults_share_entries_with_explicit_ones(self):
+        calls = []
+
+        @cached("test://defaults")
+        def query(company_keyword: str, token: str, page_size: int = 20, page_num: int = 1) -> dict:
+            calls.append((company_keyword, page_size, page_num))
+            return {"page": page_num}
+
+        query("ACME", "token")
+        query("ACME", "token", 20, 1)
+        query("ACME", "token", 20, 2)
+        self.assertEqual(calls, [("ACME", 20, 1), ("ACME", 20, 2)])
+
+
+class SingleFlightTest(unittest.TestCase):
+    def test_concurrent_identical_calls_share_one_query(self):
+        calls = []
+        release = threading.Event()
+
+        @cached("test://single-flight")
+        def query(company_keyword: str, token: str) -> dict:
+            calls.append(company_keyword)
+            release.wait(2)
+            return {"calls": len(calls)}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(query("ACME", "token"))) for _ in range(4)]
+        threads[0].start()
+        self.assertTrue(wait_until(lambda: calls))
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(2)
+        self.assertEqual(calls, ["ACME"])
+        self.assertEqual(results, [{"calls": 1}] * 4)
+
+    def test_failures_are_not_cached(self):
+        calls = []
+
+        @cached("test://failure")
+        def query(company_keyword: str, token: str) -> dict:
+            calls.append(company_keyword)
+            raise RuntimeError("Query failed: nope")
+
+        for _ in range(2):
+            with self.assertRaisesRegex(RuntimeError, "nope"):
+                query("ACME", "token")
+        self.assertEqual(len(calls), 2)
+
+
+class StaleWhileRevalidateTest(unittest.TestCase):
+    def test_stale_result_is_served_while_refreshing(self):
+        calls = []
+
+        @cached("test://stale", ttl=0, stale_ttl=60)
+        def query(company_keyword: str, token: str) -> dict:
+            calls.append(company_keyword)
+            return {"version": len(calls)}
+
+        self.assertEqual(query("ACME", "token"), {"version": 1})
+        self.assertEqual(query("ACME", "token"), {"version": 1})
+        self.assertTrue(wait_until(lambda: query("ACME", "token") == {"version": 2}))
+
+    def test_failed_refresh_keeps_the_stale_result(self):
+        calls = []
+
+        @cached("test://stale-failure", ttl=0, stale_ttl=60)
+        def query(company_keyword: str, token: str) -> dict:
+            calls.append(company_keyword)
+            if len(calls) > 1:
+                raise RuntimeError("Query failed: nope")
+            return {"version": 1}
+
+        self.assertEqual(query("ACME", "token"), {"version": 1})
+        with self.assertLogs("tools._cache", "WARNING") as logs:
+            self.assertEqual(query("ACME", "token"), {"version": 1})
+            self.assertTrue(wait_until(lambda: len(logs.output) == 1 and not _in_flight))
+            self.assertEqual(query("ACME", "token"), {"version": 1})
+            self.assertTrue(wait_until(lambda: len(logs.output) == 2 and not _in_flight))
+        self.assertIn("Background refresh of test://stale-failure failed", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
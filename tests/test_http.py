@@ -0,0 +1,145 @@
+import random
+import socket
+import threading
+import time
+import unittest
+from unittest import mock
+
+from requests.exceptions import Timeout
+
+from tools._http import MAX_PAGES, SESSION, call_api, fetch_all_pages, parse_paging
+
+
+class HangingServer:
+    """Local server that accepts connections and never replies"""
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.port = self.sock.getsockname()[1]
+        self.accepted = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.accepted.append(conn)
+
+    def close(self):
+        self.sock.close()
+        for conn in self.accepted:
+            conn.close()
+
+
+class ReadTimeoutTest(unittest.TestCase):
+    def setUp(self):
+        self.server = HangingServer()
+        self.addCleanup(self.server.close)
+
+    def test_read_timeout_fails_fast_without_retrying(self):
+        start = time.monotonic()
+        with self.assertRaises(Timeout):
+            SESSION.get(f"http://127.0.0.1:{self.server.port}/", timeout=(1, 0.5))
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(len(self.server.accepted), 1)
+
+
+class ParsePagingTest(unittest.TestCase):
+    def test_blank_values_use_defaults(self):
+        self.assertEqual(parse_paging({}), (20, 1, None))
+        self.assertEqual(parse_paging({"page_size": "", "page_num": None}), (20, 1, None))
+
+    def test_values_are_coerced_to_int(self):
+        self.assertEqual(parse_paging({"page_size": "5", "page_num": "2"}), (5, 2, None))
+
+    def test_non_positive_and_non_numeric_values_are_rejected(self):
+        for tool_parameters in ({"page_size": 0}, {"page_num": "-1"}, {"page_size": "x"}):
+            self.assertIsNotNone(parse_paging(tool_parameters)[2])
+
+
+def paged_fetch(total: int, failing_page: int | None = None):
+    """Fake paginated API call returning records named after their page and position"""
+    def fetch(company_keyword: str, token: str, page_size: int, page_num: int) -> dict:
+        time.sleep(random.uniform(0, 0.01))
+        if page_num == failing_page:
+            raise RuntimeError(f"page {page_num} failed")
+        count = max(min(page_size, total - (page_num - 1) * page_size), 0)
+        return {"Section": {
+            "Total Records": total,
+            "Current Page": page_num,
+            "Records": [f"{page_num}-{i}" for i in range(count)]
+        }}
+    return fetch
+
+
+class FetchAllPagesTest(unittest.TestCase):
+    def test_pages_are_merged_in_order(self):
+        result = fetch_all_pages(paged_fetch(45), "ACME", "token", 20, "Section", "Records")["Section"]
+        expected = [f"{page}-{i}" for page, count in ((1, 20), (2, 20), (3, 5)) for i in range(count)]
+        self.assertEqual(result["Records"], expected)
+        self.assertEqual(result["Pages Fetched"], 3)
+        self.assertNotIn("Current Page", result)
+        self.assertNotIn("Note", result)
+
+    def test_page_count_is_capped_with_a_note(self):
+        result = fetch_all_pages(paged_fetch(1000), "ACME", "token", 10, "Section", "Records")["Section"]
+        self.assertEqual(result["Pages Fetched"], MAX_PAGES)
+        self.assertEqual(len(result["Records"]), MAX_PAGES * 10)
+        self.assertIn("only showing the first 200", result["Note"])
+
+    def test_failed_page_fails_the_whole_fetch(self):
+        with self.assertRaisesRegex(RuntimeError, "page 2 failed"):
+            fetch_all_pages(paged_fetch(45, failing_page=2), "ACME", "token", 20, "Section", "Records")
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response as read by call_api"""
+
+    def __init__(self, status_code: int, body: bytes = b"", etag: str | None = None):
+        self.status_code = status_code
+        self.content = body
+        self.headers = {"ETag": etag} if etag else {}
+        self.raw = mock.Mock(read=lambda decode_content: body)
+
+    def close(self):
+        pass
+
+
+class RevalidationTest(unittest.TestCase):
+    def stub_session(self, *responses):
+        sent = []
+        replies = iter(responses)
+
+        def get(url, **kwargs):
+            sent.append(kwargs["headers"].get("If-None-Match"))
+            return next(replies)
+
+        patcher = mock.patch.object(SESSION, "get", get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return sent
+
+    def test_not_modified_returns_the_earlier_result(self):
+        sent = self.stub_session(
+            FakeResponse(200, b'{"error_code": 0, "result": {"total": 1}}', etag='"v1"'),
+            FakeResponse(304)
+        )
+        first = call_api("https://example.test/revalidate", "token", {"keyword": "ACME"})
+        second = call_api("https://example.test/revalidate", "token", {"keyword": "ACME"})
+        self.assertEqual(sent, [None, '"v1"'])
+        self.assertIs(second, first)
+
+    def test_streamed_queries_are_not_revalidated(self):
+        body = b'{"error_code": 0, "result": {"total": 1}}'
+        sent = self.stub_session(FakeResponse(200, body, etag='"v1"'), FakeResponse(200, body, etag='"v1"'))
+        for _ in range(2):
+            call_api("https://example.test/streamed", "token", {"keyword": "ACME"}, stream=True)
+        self.assertEqual(sent, [None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from cachetools import TTLCache
+from requests.exceptions import Timeout
+
+from tools._http import TIMEOUT, json_dumps, json_loads
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds a successful API result stays cached, tunable through TYC_CACHE_TTL
+CACHE_TTL = int(os.environ.get("TYC_CACHE_TTL", "3600"))
+
+# Lifetime in seconds -> cache of (result, monotonic time it stops being fresh)
+_caches: dict[int, TTLCache] = {}
+_lock = threading.RLock()
+
+# Cache key -> future of the call currently fetching it
+_in_flight: dict[tuple, Future] = {}
+
+# Background refreshes of stale entries run on their own workers, never on the shared
+# pool, so pool workers waiting on a refresh can't starve it
+_REFRESH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tianyancha-refresh")
+
+# Longest wait for an identical in-flight call: one request and its three retries
+_WAIT_TIMEOUT = sum(TIMEOUT) * 4
+
+# Optional Redis cache shared between plugin processes, enabled by REDIS_URL
+REDIS_URL = os.environ.get("REDIS_URL")
+_redis = (
+    redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+    if redis is not None and REDIS_URL else None
+)
+if REDIS_URL and redis is None:
+    logger.warning("REDIS_URL is set but the optional redis package is not installed, using the local cache only")
+
+
+@functools.lru_cache(maxsize=2048)
+def canonical_keyword(keyword: str) -> str:
+    """Normalize width, case and whitespace so trivially different spellings share entries"""
+    return " ".join(unicodedata.normalize("NFKC", keyword).split()).casefold()
+
+
+def _redis_key(key: tuple) -> str:
+    """Redis key for a cache key, hashed so tokens are never stored in clear"""
+    digest = hashlib.blake2b("\0".join(map(str, key)).encode(), digest_size=16).hexdigest()
+    return f"tyc:{digest}"
+
+
+def _redis_get(key: tuple):
+    """Look up a result in Redis, None if disabled, missing or unavailable"""
+    if _redis is None:
+        return None
+    try:
+        value = _redis.get(_redis_key(key))
+    except redis.RedisError as e:
+        logger.warning("Redis cache lookup failed: %s", e)
+        return None
+    return json_loads(value) if value is not None else None
+
+
+def _redis_set(key: tuple, result, ttl: int) -> None:
+    """Store a result in Redis if enabled, ignoring an unavailable server"""
+    if _redis is None or ttl <= 0:
+        return
+    try:
+        _redis.setex(_redis_key(key), ttl, json_dumps(result))
+    except redis.RedisError as e:
+        logger.warning("Redis cache update failed: %s", e)
+
+
+def cached(endpoint: str, ttl: int = CACHE_TTL, stale_ttl: int = 0):
+    """
+    Cache the formatted result of an API call function
+
+    The wrapped function takes (company_keyword, token, *args). Results are keyed
+    by endpoint, token, canonical keyword and arguments with defaults filled in,
+    so different API tokens never share entries and omitted defaults match
+    explicit ones. When REDIS_URL is set, results are also shared between
+    plugin processes through Redis. Failed calls raise and are therefore never
+    cached. Cached results are shared between callers and must not be modified.
+    Concurrent calls with the same key wait for the first one instead of each
+    querying the API, raising requests' Timeout if it takes too long.
+
+    Parameters:
+        endpoint: API endpoint the wrapped function calls
+        ttl: Seconds a result is fresh
+        stale_ttl: Seconds after that during which the stale result is still
+            returned at once while it is refreshed in the background
+    """
+    with _lock:
+        cache = _caches.get(ttl + stale_ttl)
+        if cache is None:
+            cache = _caches[ttl + stale_ttl] = TTLCache(maxsize=1024, ttl=ttl + stale_ttl)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def fetch(key: tuple, future: Future, company_keyword: str, token: str, *args):
+            """Call the API as the single caller for key and publish the result"""
+            try:
+                result = _redis_get(key)
+                if result is None:
+                    result = func(company_keyword, token, *args)
+                    _redis_set(key, result, ttl)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                with _lock:
+                    cache[key] = (result, time.monotonic() + ttl)
+                future.set_result(result)
+                return result
+            finally:
+                with _lock:
+                    del _in_flight[key]
+
+        def refresh(*fetch_args):
+            """Refresh a stale entry in the background, keeping it on failure"""
+            try:
+                fetch(*fetch_args)
+            except Exception as e:
+                logger.warning("Background refresh of %s failed: %s", endpoint, e)
+
+        @functools.wraps(func)
+        def wrapper(company_keyword: str, token: str, *args):
+            # Fill in defaulted arguments so omitting them shares entries with passing them
+            bound = signature.bind(company_keyword, token, *args)
+            bound.apply_defaults()
+            args = bound.args[2:]
+            key = (endpoint, token, canonical_keyword(company_keyword), *args)
+            with _lock:
+                entry = cache.get(key)
+                future = _in_flight.get(key)
+                if entry is not None:
+                    result, fresh_until = entry
+                    if future is None and time.monotonic() >= fresh_until:
+                        future = _in_flight[key] = Future()
+                        _REFRESH_POOL.submit(refresh, key, future, company_keyword, token, *args)
+                    return result
+                leader = future is None
+                if leader:
+                    future = _in_flight[key] = Future()
+            if not leader:
+                try:
+                    return future.result(timeout=_WAIT_TIMEOUT)
+                except FutureTimeoutError:
+                    raise Timeout(f"Timed out waiting for an identical query to {endpoint}") from None
+            return fetch(key, future, company_keyword, token, *args)
+        return wrapper
+    return decorator
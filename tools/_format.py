@@ -0,0 +1,45 @@
+from collections.abc import Callable
+from datetime import date
+from functools import lru_cache
+
+# Integer range of timestamps with at most 10 characters, which are in seconds;
+# longer ones are in milliseconds
+_SECONDS_MIN = -999_999_999
+_SECONDS_MAX = 9_999_999_999
+
+
+def field_table(*fields: tuple[str, str]) -> Callable[[dict], dict]:
+    """
+    Compile (output key, API key) pairs into a function building output records
+    
+    The returned function takes an API item and returns a single dict display
+    with each output key mapped to the API value, None if missing, in pair
+    order. It is called directly on each item, so records are built without
+    looping over the pairs. Keys are embedded with repr and must be the
+    module's own string constants.
+    """
+    body = ", ".join(f"{key!r}: item.get({api_key!r})" for key, api_key in fields)
+    return eval(f"lambda item: {{{body}}}")
+
+
+def format_timestamp(timestamp) -> str | None:
+    """Format second or millisecond timestamp to readable date, None if empty or invalid"""
+    if not timestamp:
+        return None
+    try:
+        timestamp = int(timestamp)
+    except (ValueError, TypeError):
+        return None
+    return _format_date(timestamp)
+
+
+@lru_cache(maxsize=4096)
+def _format_date(timestamp: int) -> str | None:
+    """Format integer timestamp to readable date, cached as many records share dates"""
+    try:
+        # Convert millisecond timestamp to seconds
+        if not _SECONDS_MIN <= timestamp <= _SECONDS_MAX:
+            timestamp //= 1000
+        return date.fromtimestamp(timestamp).isoformat()
+    except (ValueError, OverflowError, OSError):
+        return None
@@ -0,0 +1,282 @@
+import os
+import re
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Any
+
+import requests
+from cachetools import LRUCache
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    from json import dumps as json_dumps, loads as json_loads
+
+# Connect / read timeout for every Tianyancha API call
+TIMEOUT = (3.05, 10)
+
+# Shared session so all tools reuse keep-alive connections to the API host
+SESSION = requests.Session()
+SESSION.headers["User-Agent"] = "tianyancha-dify-plugin"
+SESSION.headers["Accept"] = "application/json"
+
+# Longest Retry-After wait honoured before retrying, so a rate limit can't pin a worker
+_MAX_RETRY_AFTER = 5
+
+
+class _Retry(Retry):
+    """Retry policy that caps the wait requested by a Retry-After header"""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, _MAX_RETRY_AFTER)
+
+
+# Retry transient upstream failures inside the pool with jittered backoff; the final
+# response is still returned to the caller so the usual status code handling applies.
+# Read timeouts are not retried so a hung upstream fails fast as requests' ReadTimeout
+_retry = _Retry(
+    total=3,
+    read=False,
+    backoff_factor=0.5,
+    backoff_jitter=0.25,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(["GET"]),
+    respect_retry_after_header=True,
+    raise_on_status=False
+)
+
+# Keep-alive connections kept per host, tunable through TYC_POOL_SIZE to match the
+# number of tool invocations the plugin runs at once
+POOL_SIZE = int(os.environ.get("TYC_POOL_SIZE", "50"))
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=POOL_SIZE, max_retries=_retry)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+@lru_cache(maxsize=64)
+def auth_headers(token: str) -> dict[str, str]:
+    """
+    Request headers carrying an API token, built once per token
+    
+    Tokens differ between plugin tenants, so they can't live on the shared
+    session. The returned dict is shared and must not be modified.
+    """
+    return {"Authorization": token}
+
+
+# Worker pool for issuing several API calls at once
+POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tianyancha")
+
+
+def iter_concurrently(calls: dict[str, tuple]) -> Iterator[tuple[str, Any]]:
+    """
+    Run several API calls at once on the shared worker pool
+    
+    Parameters:
+        calls: Mapping of name to (function, *args)
+        
+    Yields:
+        (name, result) pairs in completion order, where result is the call's
+        return value or the exception it raised
+    """
+    futures = {POOL.submit(func, *args): name for name, (func, *args) in calls.items()}
+    for future in as_completed(futures):
+        try:
+            yield futures[future], future.result()
+        except Exception as e:
+            yield futures[future], e
+
+
+# Longest company keyword sent to the API; names and credit codes are far shorter
+MAX_KEYWORD_LENGTH = 128
+_CONTROL_CHARS = re.compile(r"[\x00-\x1f\x7f]")
+
+
+def keyword_error(company_keyword: str) -> str | None:
+    """Reason a stripped company keyword is rejected without querying the API, None if valid"""
+    if not company_keyword:
+        return "Company keyword cannot be empty"
+    if len(company_keyword) > MAX_KEYWORD_LENGTH:
+        return f"Company keyword cannot be longer than {MAX_KEYWORD_LENGTH} characters"
+    if _CONTROL_CHARS.search(company_keyword):
+        return "Company keyword cannot contain control characters"
+    return None
+
+
+# Paging used when a tool's optional page_size / page_num parameters are left blank
+DEFAULT_PAGE_SIZE = 20
+DEFAULT_PAGE_NUM = 1
+
+
+def _int_or_default(value, default: int) -> int:
+    """Integer value of an optional tool parameter, the default if missing or blank"""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return default
+    return int(value)
+
+
+def parse_paging(tool_parameters: dict) -> tuple[int, int, str | None]:
+    """
+    Read page size and page number from tool parameters as integers
+    
+    Missing or blank values fall back to the defaults. Coercing once means equal
+    queries share cache entries and in-flight calls whatever type Dify passed.
+    
+    Returns:
+        (page_size, page_num, error message), the message being None if both are
+        positive integers
+    """
+    try:
+        page_size = _int_or_default(tool_parameters.get("page_size"), DEFAULT_PAGE_SIZE)
+        page_num = _int_or_default(tool_parameters.get("page_num"), DEFAULT_PAGE_NUM)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE, DEFAULT_PAGE_NUM, "Page size and page number must be positive integers"
+    if page_size < 1 or page_num < 1:
+        return page_size, page_num, "Page size and page number must be positive integers"
+    return page_size, page_num, None
+
+
+# Longest part of an error response body quoted in exception messages
+_ERROR_BODY_LIMIT = 512
+
+
+def check_status(response: requests.Response) -> None:
+    """
+    Raise RuntimeError if the API did not answer with status 200
+    
+    Only the start of the error body is read and quoted, so large error pages
+    are never loaded completely.
+    """
+    if response.status_code == 200:
+        return
+    try:
+        body = next(response.iter_content(_ERROR_BODY_LIMIT), b"")
+    finally:
+        response.close()
+    raise RuntimeError(
+        f"API request failed, status code: {response.status_code}, response: {body.decode(errors='replace')}"
+    )
+
+
+# Query -> (ETag, result) of its last successful response, for conditional requests;
+# kept small since the formatted results are cached separately
+_validated: LRUCache = LRUCache(maxsize=256)
+_validated_lock = threading.Lock()
+
+
+def call_api(url: str, token: str, params: dict, stream: bool = False):
+    """
+    Query a Tianyancha API endpoint and return the result object of its response
+    
+    When an earlier response carried an ETag, the query is sent with If-None-Match
+    and a 304 Not Modified answer returns the earlier result without a body. The
+    returned result may therefore be shared and must not be modified. Streamed
+    queries are never revalidated, so their large results are not kept around.
+    
+    Parameters:
+        url: API endpoint
+        token: API credentials
+        params: Query parameters
+        stream: Whether to stream the body, for endpoints with large payloads
+        
+    Returns:
+        The "result" member of the response
+        
+    Raises:
+        RuntimeError: If the HTTP status or the API error code reports a failure
+    """
+    key = (url, token, *sorted(params.items()))
+    validated = None
+    if not stream:
+        with _validated_lock:
+            validated = _validated.get(key)
+    headers = auth_headers(token)
+    if validated is not None:
+        headers = {**headers, "If-None-Match": validated[0]}
+    response = SESSION.get(url, params=params, headers=headers, timeout=TIMEOUT, stream=stream)
+    if response.status_code == 304 and validated is not None:
+        response.close()
+        return validated[1]
+    check_status(response)
+    response_data = json_loads(read_streamed_body(response) if stream else response.content)
+    if response_data.get("error_code") != 0:
+        error_msg = response_data.get("reason", "Unknown error")
+        raise RuntimeError(f"Query failed: {error_msg}")
+    result = response_data.get("result", {})
+    etag = response.headers.get("ETag")
+    if etag and not stream:
+        with _validated_lock:
+            _validated[key] = (etag, result)
+    return result
+
+
+# Upper bound on pages fetched by one fetch_all_pages call, to protect the API quota
+MAX_PAGES = 20
+
+# Paging labels of (total, current page, pages fetched, note) used by each output style
+TITLE_CASE_LABELS = ("Total Records", "Current Page", "Pages Fetched", "Note")
+SNAKE_CASE_LABELS = ("total_records", "current_page", "pages_fetched", "note")
+
+
+def fetch_all_pages(
+    fetch, company_keyword: str, token: str, page_size: int, section: str, records_key: str,
+    labels: tuple[str, str, str, str] = TITLE_CASE_LABELS
+) -> dict:
+    """
+    Fetch every page of a paginated API call and merge the records in page order
+    
+    The first page is fetched to learn the total, then the remaining pages are
+    fetched at once on the shared worker pool.
+    
+    Parameters:
+        fetch: API call function taking (company_keyword, token, page_size, page_num)
+            and returning {section: {total label: ..., records_key: [...], ...}}
+        company_keyword: Company keyword
+        token: API credentials
+        page_size: Number of records per page
+        section: Top-level key of the formatted result
+        records_key: Key of the record list inside the section
+        labels: Paging labels of the section, TITLE_CASE_LABELS or SNAKE_CASE_LABELS
+        
+    Returns:
+        Formatted result with the records of all fetched pages
+    """
+    total_key, page_key, pages_key, note_key = labels
+    first = fetch(company_keyword, token, page_size, 1)[section]
+    total = int(first.get(total_key) or 0)
+    pages = min(max(-(-total // page_size), 1), MAX_PAGES)
+    
+    responses = dict(iter_concurrently({
+        str(page_num): (fetch, company_keyword, token, page_size, page_num) for page_num in range(2, pages + 1)
+    }))
+    records = list(first[records_key])
+    for page_num in range(2, pages + 1):
+        response = responses[str(page_num)]
+        if isinstance(response, Exception):
+            raise response
+        records.extend(response[section][records_key])
+    
+    merged = {key: value for key, value in first.items() if key != page_key}
+    merged[pages_key] = pages
+    merged[records_key] = records
+    if total > pages * page_size:
+        merged[note_key] = f"There are {total} records in total, only showing the first {pages * page_size}"
+    return {section: merged}
+
+
+def read_streamed_body(response: requests.Response) -> bytes:
+    """
+    Read the body of a response requested with stream=True
+    
+    The decoded bytes are read straight from the connection instead of being
+    assembled chunk by chunk into response.content, which keeps peak memory
+    down for large payloads. The connection is returned to the pool afterwards.
+    """
+    try:
+        return response.raw.read(decode_content=True)
+    finally:
+        response.close()
@@ -1,11 +1,113 @@
 from collections.abc import Generator
 from typing import Any
-import requests
-from datetime import datetime
+
+from requests.exceptions import Timeout
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from tools._cache import cached
+from tools._format import field_table, format_timestamp
+from tools._http import call_api, keyword_error
+
+_API_URL = "https://open.api.tianyancha.com/services/open/ic/baseinfo/normal"
+
+# Field tables of (output key, API key); dates and capital are patched after building
+_BASIC_INFO_FIELDS = field_table(
+    ("Company Name", "name"),
+    ("English Name", "property3"),
+    ("Company Alias", "alias"),
+    ("Legal Representative", "legalPersonName"),
+    ("Company Type", "companyOrgType"),
+    ("Registered Capital", "regCapital"),
+    ("Paid-in Capital", "actualCapital"),
+    ("Establishment Date", "estiblishTime"),
+    ("Business Status", "regStatus"),
+    ("Unified Social Credit Code", "creditCode"),
+    ("Business Registration Number", "regNumber"),
+    ("Organization Code", "orgNumber"),
+    ("Taxpayer Identification Number", "taxNumber"),
+    ("Industry", "industry"),
+    ("Industry Details", "industryAll")
+)
+
+_REGISTRATION_FIELDS = field_table(
+    ("Registration Authority", "regInstitute"),
+    ("Registered Address", "regLocation"),
+    ("Business Scope", "businessScope")
+)
+
+
+def _format_timestamp(timestamp):
+    """Format timestamp to readable date"""
+    if not timestamp:
+        return "Unknown"
+    formatted = format_timestamp(timestamp)
+    return formatted if formatted is not None else str(timestamp)
+
+
+@cached(_API_URL)
+def get_company_base_info(company_keyword: str, token: str) -> dict:
+    """
+    API call implementation for getting company basic information
+    
+    Parameters:
+        company_keyword: Company keyword
+        token: API credentials
+        
+    Returns:
+        Formatted company basic information
+    """
+    # Build request
+    params = {"keyword": company_keyword}
+    
+    # Send request
+    company_data = call_api(_API_URL, token, params)
+    
+    if not company_data:
+        raise RuntimeError("Query failed: No company information found")
+    
+    # Build formatted information
+    basic_info = _BASIC_INFO_FIELDS(company_data)
+    basic_info["Registered Capital"] = f"{basic_info['Registered Capital']}"
+    basic_info["Paid-in Capital"] = f"{basic_info['Paid-in Capital']}"
+    basic_info["Establishment Date"] = _format_timestamp(basic_info["Establishment Date"])
+    # A missing industryAll means no details; an explicit null is kept as is
+    if "industryAll" not in company_data:
+        basic_info["Industry Details"] = {}
+    
+    reg_info = _REGISTRATION_FIELDS(company_data)
+    reg_info["Business Term"] = f"{_format_timestamp(company_data.get('fromTime'))} to {_format_timestamp(company_data.get('toTime'))}"
+    
+    return {
+        "Basic Information": basic_info,
+        "Registration Information": reg_info,
+        "Company Tags": company_data.get("tags", "").split(";") if company_data.get("tags") else []
+    }
+
+
+def _generate_base_info_text(data: dict) -> str:
+    """Generate readable text for company basic information"""
+    basic_info = data.get("Basic Information", {})
+    reg_info = data.get("Registration Information", {})
+    tags = data.get("Company Tags", [])
+    
+    parts = [f"# Basic Information of {basic_info.get('Company Name', 'Unknown Company')}\n\n"]
+    
+    parts.append("## Basic Information\n")
+    # Exclude industry details as it may be complex structure
+    parts.extend(f"- **{key}**: {value}\n" for key, value in basic_info.items() if value and key != "Industry Details")
+    
+    parts.append("\n## Registration Information\n")
+    parts.extend(f"- **{key}**: {value}\n" for key, value in reg_info.items() if value)
+    
+    if tags:
+        parts.append("\n## Company Tags\n")
+        parts.append("- " + ", ".join(tags) + "\n")
+    
+    return "".join(parts)
+
+
 class TianyanchaBaseInfoTool(Tool):
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
         """
@@ -16,10 +118,10 @@ class TianyanchaBaseInfoTool(Tool):
                 - company_keyword: Company keyword (name or ID)
         """
         # Get parameters
-        company_keyword = tool_parameters.get("company_keyword")
+        company_keyword = (tool_parameters.get("company_keyword") or "").strip()
         
-        if not company_keyword:
-            error_message = "Company keyword cannot be empty"
+        error_message = keyword_error(company_keyword)
+        if error_message:
             yield self.create_json_message({"error": error_message})
             yield self.create_text_message(error_message)
             return
@@ -35,111 +137,18 @@ class TianyanchaBaseInfoTool(Tool):
         
         # Call API to get basic information
         try:
-            result = self._get_company_base_info(company_keyword, token)
-            text_result = self._generate_base_info_text(result)
+            result = get_company_base_info(company_keyword, token)
+            text_result = _generate_base_info_text(result)
             
             # Return structured JSON data
             yield self.create_json_message(result)
             # Return readable text format
             yield self.create_text_message(text_result)
+        except Timeout:
+            error_message = "Tianyancha API request timed out, please try again later"
+            yield self.create_json_message({"error": error_message})
+            yield self.create_text_message(error_message)
         except Exception as e:
             error_message = f"Error occurred during request: {str(e)}"
             yield self.create_json_message({"error": error_message})
             yield self.create_text_message(error_message)
-            
-    def _format_timestamp(self, timestamp):
-        """Format timestamp to readable date"""
-        if not timestamp:
-            return "Unknown"
-        try:
-            # Convert millisecond timestamp to seconds
-            if len(str(timestamp)) > 10:
-                timestamp = int(timestamp) / 1000
-            return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
-        except (ValueError, TypeError):
-            return str(timestamp)
-    
-    def _generate_base_info_text(self, data: dict) -> str:
-        """Generate readable text for company basic information"""
-        basic_info = data.get("Basic Information", {})
-        reg_info = data.get("Registration Information", {})
-        tags = data.get("Company Tags", [])
-        
-        text = f"# Basic Information of {basic_info.get('Company Name', 'Unknown Company')}\n\n"
-        
-        text += "## Basic Information\n"
-        for key, value in basic_info.items():
-            if value and key != "Industry Details":  # Exclude industry details as it may be complex structure
-                text += f"- **{key}**: {value}\n"
-        
-        text += "\n## Registration Information\n"
-        for key, value in reg_info.items():
-            if value:
-                text += f"- **{key}**: {value}\n"
-        
-        if tags:
-            text += "\n## Company Tags\n"
-            text += "- " + ", ".join(tags) + "\n"
-        
-        return text
-    
-    def _get_company_base_info(self, company_keyword: str, token: str) -> dict:
-        """
-        API call implementation for getting company basic information
-        
-        Parameters:
-            company_keyword: Company keyword
-            token: API credentials
-            
-        Returns:
-            Formatted company basic information
-        """
-        # Build request
-        url = f"http://open.api.tianyancha.com/services/open/ic/baseinfo/normal?keyword={company_keyword}"
-        headers = {'Authorization': token}
-        
-        # Send request
-        response = requests.get(url, headers=headers)
-        
-        # Check response status
-        if response.status_code != 200:
-            raise Exception(f"API request failed, status code: {response.status_code}, response: {response.text}")
-            
-        # Parse JSON response
-        response_data = response.json()
-        
-        # Check API return status
-        if response_data.get("error_code") != 0 or not response_data.get("result"):
-            error_msg = response_data.get("reason", "Unknown error")
-            raise Exception(f"Query failed: {error_msg}")
-            
-        # Extract company basic information fields
-        company_data = response_data.get("result", {})
-        
-        # Build formatted information
-        return {
-            "Basic Information": {
-                "Company Name": company_data.get("name"),
-                "English Name": company_data.get("property3"),
-                "Company Alias": company_data.get("alias"),
-                "Legal Representative": company_data.get("legalPersonName"),
-                "Company Type": company_data.get("companyOrgType"),
-                "Registered Capital": f"{company_data.get('regCapital')}",
-                "Paid-in Capital": f"{company_data.get('actualCapital')}",
-                "Establishment Date": self._format_timestamp(company_data.get("estiblishTime")),
-                "Business Status": company_data.get("regStatus"),
-                "Unified Social Credit Code": company_data.get("creditCode"),
-                "Business Registration Number": company_data.get("regNumber"),
-                "Organization Code": company_data.get("orgNumber"),
-                "Taxpayer Identification Number": company_data.get("taxNumber"),
-                "Industry": company_data.get("industry"),
-                "Industry Details": company_data.get("industryAll", {})
-            },
-            "Registration Information": {
-                "Registration Authority": company_data.get("regInstitute"),
-                "Registered Address": company_data.get("regLocation"),
-                "Business Scope": company_data.get("businessScope"),
-                "Business Term": f"{self._format_timestamp(company_data.get('fromTime'))} to {self._format_timestamp(company_data.get('toTime'))}"
-            },
-            "Company Tags": company_data.get("tags", "").split(";") if company_data.get("tags") else []
-        }
\ No newline at end of file
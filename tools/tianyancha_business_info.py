@@ -1,11 +1,175 @@
 from collections.abc import Generator
 from typing import Any
-import requests
-from datetime import datetime
+
+from requests.exceptions import Timeout
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from tools._cache import cached
+from tools._format import field_table, format_timestamp
+from tools._http import call_api, keyword_error
+
+_API_URL = "https://open.api.tianyancha.com/services/open/cb/ic/2.0"
+
+# Field table of (output key, API key) for the basic information section
+_BASIC_INFO_FIELDS = field_table(
+    ("Company Name", "name"),
+    ("Registered Capital", "regCapital"),
+    ("Paid-in Capital", "actualCapital"),
+    ("Establishment Date", "estiblishTime"),
+    ("Unified Social Credit Code", "creditCode"),
+    ("Business Registration Number", "regNumber"),
+    ("Company Type", "companyOrgType"),
+    ("Business Status", "regStatus"),
+    ("Legal Representative", "legalPersonName"),
+    ("Registered Address", "regLocation"),
+    ("Registration Authority", "regInstitute"),
+    ("Business Scope", "businessScope")
+)
+
+# Maximum number of records returned per list section
+_MAX_ITEMS = 10
+
+
+def _format_timestamp(timestamp):
+    """Format timestamp to readable date"""
+    if not timestamp:
+        return "Unknown"
+    formatted = format_timestamp(timestamp)
+    return formatted if formatted is not None else str(timestamp)
+
+
+@cached(_API_URL)
+def get_company_business_info(company_keyword: str, token: str) -> dict:
+    """
+    API call implementation for getting company business information
+    
+    Parameters:
+        company_keyword: Company keyword
+        token: API credentials
+        
+    Returns:
+        Formatted company business information
+    """
+    # Build request
+    params = {"keyword": company_keyword}
+    
+    # Send request, streaming the potentially large body
+    business_data = call_api(_API_URL, token, params, stream=True)
+    
+    # Build formatted information
+    result = {"Business Information": {}}
+    
+    # Basic information section
+    basic_info = _BASIC_INFO_FIELDS(business_data)
+    basic_info["Establishment Date"] = _format_timestamp(basic_info["Establishment Date"])
+    result["Business Information"]["Basic Information"] = basic_info
+    
+    # List sections, skipping those missing from the response
+    for api_key, section, format_row, description in _SECTIONS:
+        rows = business_data.get(api_key)
+        if not rows:
+            continue
+        
+        if description is None:
+            result["Business Information"][section] = list(map(format_row, rows))
+            continue
+        
+        # Only take the first records to avoid too much data
+        result["Business Information"][section] = list(map(format_row, rows[:_MAX_ITEMS]))
+        
+        # If more records than shown, add note
+        if len(rows) > _MAX_ITEMS:
+            result["Business Information"][f"{section} Note"] = f"The company has a total of {len(rows)} {description}, only showing the first {_MAX_ITEMS}"
+        
+    return result
+
+
+# Field tables of (output key, API key) for each list section
+_STAFF_FIELDS = field_table(
+    ("Name", "name"),
+    ("Position", "staffTypeName"),
+    ("Other Positions", "typeJoin")
+)
+
+_CAPITAL_FIELDS = field_table(
+    ("Investment Amount", "amomon"),
+    ("Investment Ratio", "percent"),
+    ("Investment Method", "paymet"),
+    ("Investment Time", "time")
+)
+
+_INVEST_FIELDS = field_table(
+    ("Invested Company Name", "name"),
+    ("Invested Company Alias", "alias"),
+    ("Investment Ratio", "percent"),
+    ("Investment Amount", "amount"),
+    ("Registered Capital", "regCapital"),
+    ("Business Status", "regStatus"),
+    ("Establishment Date", "estiblishTime"),
+    ("Industry", "category")
+)
+
+_BRANCH_FIELDS = field_table(
+    ("Branch Name", "name"),
+    ("Branch Alias", "alias"),
+    ("Registration Status", "regStatus"),
+    ("Establishment Date", "estiblishTime"),
+    ("Person in Charge", "legalPersonName")
+)
+
+_CHANGE_FIELDS = field_table(
+    ("Change Item", "changeItem"),
+    ("Change Time", "changeTime"),
+    ("Content Before", "contentBefore"),
+    ("Content After", "contentAfter")
+)
+
+
+def _format_staff(staff: dict) -> dict:
+    """Format key personnel information"""
+    entry = _STAFF_FIELDS(staff)
+    # A missing typeJoin means no other positions; an explicit null is kept as is
+    if "typeJoin" not in staff:
+        entry["Other Positions"] = []
+    return entry
+
+
+def _format_shareholder(shareholder: dict) -> dict:
+    """Format shareholder information"""
+    return {
+        "Shareholder Name": shareholder.get("name"),
+        "Shareholder Type": "Individual" if shareholder.get("type") == 2 else "Enterprise",
+        "Capital Information": list(map(_CAPITAL_FIELDS, shareholder.get("capital", [])))
+    }
+
+
+def _format_invest(invest: dict) -> dict:
+    """Format external investment information"""
+    entry = _INVEST_FIELDS(invest)
+    entry["Establishment Date"] = _format_timestamp(entry["Establishment Date"])
+    return entry
+
+
+def _format_branch(branch: dict) -> dict:
+    """Format branch information"""
+    entry = _BRANCH_FIELDS(branch)
+    entry["Establishment Date"] = _format_timestamp(entry["Establishment Date"])
+    return entry
+
+
+# List sections as (API key, output key, row formatter, description of the records),
+# where sections with a description are limited to _MAX_ITEMS records
+_SECTIONS = (
+    ("staffList", "Key Personnel", _format_staff, None),
+    ("shareHolderList", "Shareholder Information", _format_shareholder, None),
+    ("investList", "External Investments", _format_invest, "external investment companies"),
+    ("branchList", "Branches", _format_branch, "branches"),
+    ("changeList", "Change Records", _CHANGE_FIELDS, "change records")
+)
+
+
 class TianyanchaBusinessInfoTool(Tool):
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
         """
@@ -16,10 +180,10 @@ class TianyanchaBusinessInfoTool(Tool):
                 - company_keyword: Company keyword (name or ID)
         """
         # Get parameters
-        company_keyword = tool_parameters.get("company_keyword")
+        company_keyword = (tool_parameters.get("company_keyword") or "").strip()
         
-        if not company_keyword:
-            error_message = "Company keyword cannot be empty"
+        error_message = keyword_error(company_keyword)
+        if error_message:
             yield self.create_json_message({"error": error_message})
             return
             
@@ -33,166 +197,13 @@ class TianyanchaBusinessInfoTool(Tool):
         
         # Call API to get business information
         try:
-            result = self._get_company_business_info(company_keyword, token)
+            result = get_company_business_info(company_keyword, token)
             
             # Return structured JSON data only
             yield self.create_json_message(result)
+        except Timeout:
+            error_message = "Tianyancha API request timed out, please try again later"
+            yield self.create_json_message({"error": error_message})
         except Exception as e:
             error_message = f"Error occurred during request: {str(e)}"
             yield self.create_json_message({"error": error_message})
-        
-    def _format_timestamp(self, timestamp):
-        """Format timestamp to readable date"""
-        if not timestamp:
-            return "Unknown"
-        try:
-            # Convert millisecond timestamp to seconds
-            if len(str(timestamp)) > 10:
-                timestamp = int(timestamp) / 1000
-            return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
-        except (ValueError, TypeError):
-            return str(timestamp)
-            
-    def _get_company_business_info(self, company_keyword: str, token: str) -> dict:
-        """
-        API call implementation for getting company business information
-        
-        Parameters:
-            company_keyword: Company keyword
-            token: API credentials
-            
-        Returns:
-            Formatted company business information
-        """
-        # Build request
-        url = f"http://open.api.tianyancha.com/services/open/cb/ic/2.0?keyword={company_keyword}"
-        headers = {'Authorization': token}
-        
-        # Send request
-        response = requests.get(url, headers=headers)
-        
-        # Check response status
-        if response.status_code != 200:
-            raise Exception(f"API request failed, status code: {response.status_code}, response: {response.text}")
-            
-        # Parse JSON response
-        response_data = response.json()
-        
-        # Check API return status
-        if response_data.get("error_code") != 0:
-            error_msg = response_data.get("reason", "Unknown error")
-            raise Exception(f"Query failed: {error_msg}")
-            
-        # Extract business information
-        business_data = response_data.get("result", {})
-        
-        # Build formatted information
-        result = {"Business Information": {}}
-        
-        # Basic information section
-        basic_info = {
-            "Company Name": business_data.get("name"),
-            "Registered Capital": business_data.get("regCapital"),
-            "Paid-in Capital": business_data.get("actualCapital"),
-            "Establishment Date": self._format_timestamp(business_data.get("estiblishTime")),
-            "Unified Social Credit Code": business_data.get("creditCode"),
-            "Business Registration Number": business_data.get("regNumber"),
-            "Company Type": business_data.get("companyOrgType"),
-            "Business Status": business_data.get("regStatus"),
-            "Legal Representative": business_data.get("legalPersonName"),
-            "Registered Address": business_data.get("regLocation"),
-            "Registration Authority": business_data.get("regInstitute"),
-            "Business Scope": business_data.get("businessScope")
-        }
-        result["Business Information"]["Basic Information"] = basic_info
-        
-        # Key personnel
-        staff_list = business_data.get("staffList", [])
-        if staff_list:
-            staff_info = []
-            for staff in staff_list:
-                staff_info.append({
-                    "Name": staff.get("name"),
-                    "Position": staff.get("staffTypeName"),
-                    "Other Positions": staff.get("typeJoin", [])
-                })
-            result["Business Information"]["Key Personnel"] = staff_info
-        
-        # Shareholder information
-        shareholder_list = business_data.get("shareHolderList", [])
-        if shareholder_list:
-            shareholder_info = []
-            for shareholder in shareholder_list:
-                capital_info = []
-                for capital in shareholder.get("capital", []):
-                    capital_info.append({
-                        "Investment Amount": capital.get("amomon"),
-                        "Investment Ratio": capital.get("percent"),
-                        "Investment Method": capital.get("paymet"),
-                        "Investment Time": capital.get("time")
-                    })
-                
-                shareholder_info.append({
-                    "Shareholder Name": shareholder.get("name"),
-                    "Shareholder Type": "Individual" if shareholder.get("type") == 2 else "Enterprise",
-                    "Capital Information": capital_info
-                })
-            result["Business Information"]["Shareholder Information"] = shareholder_info
-        
-        # External investments
-        invest_list = business_data.get("investList", [])
-        if invest_list:
-            investment_info = []
-            for invest in invest_list[:10]:  # Only take first 10 investments to avoid too much data
-                investment_info.append({
-                    "Invested Company Name": invest.get("name"),
-                    "Invested Company Alias": invest.get("alias"),
-                    "Investment Ratio": invest.get("percent"),
-                    "Investment Amount": invest.get("amount"),
-                    "Registered Capital": invest.get("regCapital"),
-                    "Business Status": invest.get("regStatus"),
-                    "Establishment Date": self._format_timestamp(invest.get("estiblishTime")),
-                    "Industry": invest.get("category")
-                })
-            result["Business Information"]["External Investments"] = investment_info
-            
-            # If more than 10 investment companies, add note
-            if len(invest_list) > 10:
-                result["Business Information"]["External Investments Note"] = f"The company has a total of {len(invest_list)} external investment companies, only showing the first 10"
-        
-        # Branches
-        branch_list = business_data.get("branchList", [])
-        if branch_list:
-            branch_info = []
-            for branch in branch_list[:10]:  # Only take first 10 branches to avoid too much data
-                branch_info.append({
-                    "Branch Name": branch.get("name"),
-                    "Branch Alias": branch.get("alias"),
-                    "Registration Status": branch.get("regStatus"),
-                    "Establishment Date": self._format_timestamp(branch.get("estiblishTime")),
-                    "Person in Charge": branch.get("legalPersonName")
-                })
-            result["Business Information"]["Branches"] = branch_info
-            
-            # If more than 10 branches, add note
-            if len(branch_list) > 10:
-                result["Business Information"]["Branches Note"] = f"The company has a total of {len(branch_list)} branches, only showing the first 10"
-        
-        # Change records
-        change_list = business_data.get("changeList", [])
-        if change_list:
-            change_info = []
-            for change in change_list[:10]:  # Only take first 10 change records to avoid too much data
-                change_info.append({
-                    "Change Item": change.get("changeItem"),
-                    "Change Time": change.get("changeTime"),
-                    "Content Before": change.get("contentBefore"),
-                    "Content After": change.get("contentAfter")
-                })
-            result["Business Information"]["Change Records"] = change_info
-            
-            # If more than 10 change records, add note
-            if len(change_list) > 10:
-                result["Business Information"]["Change Records Note"] = f"The company has a total of {len(change_list)} change records, only showing the first 10"
-            
-        return result
\ No newline at end of file
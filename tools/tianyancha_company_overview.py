@@ -0,0 +1,78 @@
+from collections.abc import Generator
+from typing import Any
+
+from requests.exceptions import Timeout
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from tools._http import iter_concurrently, keyword_error
+from tools.tianyancha_base_info import get_company_base_info
+from tools.tianyancha_business_info import get_company_business_info
+from tools.tianyancha_guarantees import get_company_guarantees
+from tools.tianyancha_judicial_risk import get_company_judicial_risk
+
+# Query types that can be combined in one overview
+QUERY_FUNCTIONS = {
+    "base_info": get_company_base_info,
+    "business_info": get_company_business_info,
+    "judicial_risk": get_company_judicial_risk,
+    "guarantees": get_company_guarantees
+}
+
+
+class TianyanchaCompanyOverviewTool(Tool):
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
+        """
+        Get several kinds of company information in one call
+
+        Parameters:
+            tool_parameters: Dictionary containing query parameters
+                - company_keyword: Company keyword (name or ID)
+                - query_types: Comma-separated query types (base_info, business_info, judicial_risk, guarantees), or all, default all
+        """
+        # Get parameters
+        company_keyword = (tool_parameters.get("company_keyword") or "").strip()
+        query_types = [
+            query_type.strip() for query_type in (tool_parameters.get("query_types") or "all").split(",") if query_type.strip()
+        ]
+        if "all" in query_types:
+            query_types = list(QUERY_FUNCTIONS)
+
+        error_message = keyword_error(company_keyword)
+        if error_message:
+            yield self.create_json_message({"error": error_message})
+            return
+
+        if not query_types:
+            error_message = "Query types cannot be empty"
+            yield self.create_json_message({"error": error_message})
+            return
+
+        unknown_types = [query_type for query_type in query_types if query_type not in QUERY_FUNCTIONS]
+        if unknown_types:
+            error_message = f"Unsupported query types: {', '.join(unknown_types)}, available: {', '.join(QUERY_FUNCTIONS)}"
+            yield self.create_json_message({"error": error_message})
+            return
+
+        # Get credentials from runtime
+        try:
+            token = self.runtime.credentials["token"]
+        except (KeyError, AttributeError):
+            error_message = "API token not configured, please provide a valid Tianyancha API Token in plugin settings"
+            yield self.create_json_message({"error": error_message})
+            return
+
+        # Call all requested APIs concurrently and return each result as soon as it arrives,
+        # so the total wait is that of the slowest one
+        for query_type, response in iter_concurrently({
+            query_type: (QUERY_FUNCTIONS[query_type], company_keyword, token) for query_type in query_types
+        }):
+            if isinstance(response, Timeout):
+                error_message = "Tianyancha API request timed out, please try again later"
+                yield self.create_json_message({"query_type": query_type, "error": error_message})
+            elif isinstance(response, Exception):
+                error_message = f"Error occurred during request: {str(response)}"
+                yield self.create_json_message({"query_type": query_type, "error": error_message})
+            else:
+                yield self.create_json_message(response)
@@ -1,11 +1,79 @@
 from collections.abc import Generator
 from typing import Any
-import requests
-from datetime import datetime
+
+from requests.exceptions import Timeout
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from tools._cache import CACHE_TTL, cached
+from tools._format import field_table, format_timestamp
+from tools._http import SNAKE_CASE_LABELS, call_api, fetch_all_pages, keyword_error, parse_paging
+
+_API_URL = "https://open.api.tianyancha.com/services/open/mr/illegalinfo/2.0"
+
+
+# Field table of (output key, API key); dates and removal fields are patched after building
+_ILLEGAL_FIELDS = field_table(
+    ("inclusion_reason", "putReason"),
+    ("inclusion_date", "putDate"),
+    ("inclusion_department", "putDepartment"),
+    ("removal_reason", "removeReason"),
+    ("removal_date", "removeDate"),
+    ("removal_department", "removeDepartment")
+)
+
+
+def _format_illegal(item: dict) -> dict:
+    """Format serious violation information"""
+    entry = _ILLEGAL_FIELDS(item)
+    entry["inclusion_date"] = format_timestamp(entry["inclusion_date"])
+    entry["removal_reason"] = entry["removal_reason"] or "Not removed yet"
+    entry["removal_date"] = format_timestamp(entry["removal_date"]) or "Not removed yet"
+    entry["removal_department"] = entry["removal_department"] or "Not removed yet"
+    return entry
+
+
+@cached(_API_URL, stale_ttl=CACHE_TTL)
+def get_company_illegal_info(company_keyword: str, token: str, page_size: int = 20, page_num: int = 1) -> dict:
+    """
+    API call implementation for getting enterprise serious violation information
+
+    Parameters:
+        company_keyword: Company keyword
+        token: API credentials
+        page_size: Page size
+        page_num: Page number
+
+    Returns:
+        Formatted enterprise serious violation information
+    """
+    # Build request
+    params = {"keyword": company_keyword, "pageSize": page_size, "pageNum": page_num}
+
+    # Send request
+    illegal_data = call_api(_API_URL, token, params)
+    items_list = illegal_data.get("items", [])
+    total = illegal_data.get("total", 0)
+
+    # Build formatted information
+    illegal_info = list(map(_format_illegal, items_list))
+
+    result = {
+        "serious_violations": {
+            "total_records": total,
+            "current_page": page_num,
+            "page_size": page_size,
+            "violation_records": illegal_info
+        }
+    }
+
+    if not illegal_info:
+        result["serious_violations"]["note"] = "No serious violation information found for this enterprise"
+
+    return result
+
+
 class TianyanchaIllegalInfoTool(Tool):
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
         """
@@ -16,14 +84,19 @@ class TianyanchaIllegalInfoTool(Tool):
                 - company_keyword: Company keyword (name or ID)
                 - page_size: Page size, default 20
                 - page_num: Page number, default 1
+                - fetch_all: Whether to fetch all pages instead of page_num, default False
         """
         # Get parameters
-        company_keyword = tool_parameters.get("company_keyword")
-        page_size = tool_parameters.get("page_size", 20)
-        page_num = tool_parameters.get("page_num", 1)
+        company_keyword = (tool_parameters.get("company_keyword") or "").strip()
+        fetch_all = tool_parameters.get("fetch_all", False)
         
-        if not company_keyword:
-            error_message = "Company keyword cannot be empty"
+        error_message = keyword_error(company_keyword)
+        if error_message:
+            yield self.create_json_message({"error": error_message})
+            return
+        
+        page_size, page_num, error_message = parse_paging(tool_parameters)
+        if error_message:
             yield self.create_json_message({"error": error_message})
             return
             
@@ -37,86 +110,19 @@ class TianyanchaIllegalInfoTool(Tool):
         
         # Call API to get serious violation information
         try:
-            result = self._get_company_illegal_info(company_keyword, token, page_size, page_num)
+            if fetch_all:
+                result = fetch_all_pages(
+                    get_company_illegal_info, company_keyword, token, page_size,
+                    "serious_violations", "violation_records", SNAKE_CASE_LABELS
+                )
+            else:
+                result = get_company_illegal_info(company_keyword, token, page_size, page_num)
             
             # Return structured JSON data
             yield self.create_json_message(result)
+        except Timeout:
+            error_message = "Tianyancha API request timed out, please try again later"
+            yield self.create_json_message({"error": error_message})
         except Exception as e:
             error_message = f"Error occurred during request: {str(e)}"
             yield self.create_json_message({"error": error_message})
-            
-    def _format_timestamp(self, timestamp):
-        """Format timestamp to readable date"""
-        if not timestamp:
-            return None
-        try:
-            # Convert millisecond timestamp to seconds
-            if len(str(timestamp)) > 10:
-                timestamp = int(timestamp) / 1000
-            return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
-        except (ValueError, TypeError):
-            return None
-    
-    def _get_company_illegal_info(self, company_keyword: str, token: str, page_size: int = 20, page_num: int = 1) -> dict:
-        """
-        API call implementation for getting enterprise serious violation information
-        
-        Parameters:
-            company_keyword: Company keyword
-            token: API credentials
-            page_size: Page size
-            page_num: Page number
-            
-        Returns:
-            Formatted enterprise serious violation information
-        """
-        # Build request
-        url = f"http://open.api.tianyancha.com/services/open/mr/illegalinfo/2.0?keyword={company_keyword}&pageSize={page_size}&pageNum={page_num}"
-        headers = {'Authorization': token}
-        
-        # Send request
-        response = requests.get(url, headers=headers)
-        
-        # Check response status
-        if response.status_code != 200:
-            raise Exception(f"API request failed, status code: {response.status_code}, response: {response.text}")
-            
-        # Parse JSON response
-        response_data = response.json()
-        
-        # Check API return status
-        if response_data.get("error_code") != 0:
-            error_msg = response_data.get("reason", "Unknown error")
-            raise Exception(f"Query failed: {error_msg}")
-            
-        # Extract serious violation information
-        illegal_data = response_data.get("result", {})
-        items_list = illegal_data.get("items", [])
-        total = illegal_data.get("total", 0)
-        
-        # Build formatted information
-        illegal_info = []
-        for item in items_list:
-            illegal_entry = {
-                "inclusion_reason": item.get("putReason"),
-                "inclusion_date": self._format_timestamp(item.get("putDate")),
-                "inclusion_department": item.get("putDepartment"),
-                "removal_reason": item.get("removeReason") or "Not removed yet",
-                "removal_date": self._format_timestamp(item.get("removeDate")) or "Not removed yet",
-                "removal_department": item.get("removeDepartment") or "Not removed yet"
-            }
-            illegal_info.append(illegal_entry)
-            
-        result = {
-            "serious_violations": {
-                "total_records": total,
-                "current_page": page_num,
-                "page_size": page_size,
-                "violation_records": illegal_info
-            }
-        }
-        
-        if not illegal_info:
-            result["serious_violations"]["note"] = "No serious violation information found for this enterprise"
-            
-        return result
\ No newline at end of file
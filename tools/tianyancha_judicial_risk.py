@@ -1,11 +1,175 @@
 from collections.abc import Generator
 from typing import Any
-import requests
-from datetime import datetime
+from itertools import islice
+
+from requests.exceptions import Timeout
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from tools._cache import CACHE_TTL, cached
+from tools._format import field_table
+from tools._http import call_api, keyword_error
+
+_API_URL = "https://open.api.tianyancha.com/services/open/cb/judicial/2.0"
+
+# Maximum number of records returned per judicial risk category
+_MAX_ITEMS = 20
+
+# Judicial records change more often than registration data, so they are cached briefly
+_CACHE_TTL = min(CACHE_TTL, 60)
+
+
+@cached(_API_URL, ttl=_CACHE_TTL)
+def get_company_judicial_risk(company_keyword: str, token: str) -> dict:
+    """
+    API call implementation for getting enterprise judicial risk information
+    
+    Parameters:
+        company_keyword: Company keyword
+        token: API credentials
+        
+    Returns:
+        Formatted enterprise judicial risk information
+    """
+    # Build request
+    params = {"keyword": company_keyword}
+    
+    # Send request, streaming the potentially large body
+    judicial_data = call_api(_API_URL, token, params, stream=True)
+    
+    # Build formatted information
+    result = {"judicial_risk": {}}
+    
+    # Judicial risk categories, skipping those missing from the response
+    for api_key, category, format_item, description in _CATEGORIES:
+        items = judicial_data.get(api_key)
+        if not items:
+            continue
+        
+        result["judicial_risk"][category] = list(map(format_item, islice(items, _MAX_ITEMS)))
+        
+        # If more records than shown, add note
+        if len(items) > _MAX_ITEMS:
+            result["judicial_risk"][f"{category}_note"] = f"The enterprise has a total of {len(items)} {description}, only showing the first {_MAX_ITEMS}"
+    
+    # If no judicial risk data
+    if not result["judicial_risk"]:
+        result["judicial_risk"] = "No judicial risk information found for this enterprise"
+        
+    return result
+
+
+# Field tables of (output key, API key) for each judicial risk category
+_LAWSUIT_FIELDS = field_table(
+    ("case_number", "caseno"),
+    ("case_title", "title"),
+    ("case_reason", "casereason"),
+    ("case_type", "casetype"),
+    ("court", "court"),
+    ("document_type", "doctype"),
+    ("submit_time", "submittime"),
+    ("judgment_time", "judgetime"),
+    ("plaintiffs", "plaintiffs"),
+    ("defendants", "defendants"),
+    ("lawsuit_url", "lawsuitUrl")
+)
+
+_KT_ANNOUNCEMENT_FIELDS = field_table(
+    ("case_number", "caseNo"),
+    ("case_reason", "caseReason"),
+    ("court", "court"),
+    ("hearing_date", "startDate"),
+    ("courtroom", "courtroom"),
+    ("litigants", "litigant")
+)
+
+_ZHIXING_FIELDS = field_table(
+    ("case_code", "caseCode"),
+    ("execution_court", "execCourtName"),
+    ("case_filing_time", "caseCreateTime"),
+    ("execution_amount", "execMoney")
+)
+
+_COURT_ANNOUNCEMENT_FIELDS = field_table(
+    ("case_number", "caseno"),
+    ("party_1", "party1"),
+    ("party_2", "party2"),
+    ("case_reason", "reason"),
+    ("court", "courtcode"),
+    ("announcement_type", "bltntypename"),
+    ("publish_date", "publishdate")
+)
+
+_COURT_REGISTER_FIELDS = field_table(
+    ("case_number", "caseNo"),
+    ("filing_date", "filingDate"),
+    ("court", "court"),
+    ("plaintiff", "plaintiff"),
+    ("defendant", "defendant"),
+    ("case_reason", "caseReason")
+)
+
+_SEND_ANNOUNCEMENT_FIELDS = field_table(
+    ("title", "title"),
+    ("court", "court"),
+    ("announcement_date", "startDate")
+)
+
+_DISHONEST_FIELDS = field_table(
+    ("case_code", "casecode"),
+    ("dishonest_person_name", "iname"),
+    ("execution_court", "courtname"),
+    ("area", "areaname"),
+    ("filing_date", "regdate"),
+    ("publish_date", "publishdate"),
+    ("dishonest_behavior", "disrupttypename"),
+    ("performance_status", "performance"),
+    ("obligations", "duty")
+)
+
+
+def _content_summary(item: dict) -> str | None:
+    """Summarize announcement content to its first 100 characters, None if missing or null"""
+    content = item.get("content")
+    if content is None:
+        return None
+    return content[:100] + "..." if len(content) > 100 else content
+
+
+def _format_court_announcement(item: dict) -> dict:
+    """Format court announcement information"""
+    entry = _COURT_ANNOUNCEMENT_FIELDS(item)
+    entry["content_summary"] = _content_summary(item)
+    return entry
+
+
+def _format_court_register(item: dict) -> dict:
+    """Format case filing information"""
+    entry = _COURT_REGISTER_FIELDS(item)
+    entry["case_reason"] = entry["case_reason"] or "Not disclosed"
+    return entry
+
+
+def _format_send_announcement(item: dict) -> dict:
+    """Format service announcement information"""
+    entry = _SEND_ANNOUNCEMENT_FIELDS(item)
+    entry["content_summary"] = _content_summary(item)
+    return entry
+
+
+# Judicial risk categories as (API key, output key, item formatter, description of the records)
+_CATEGORIES = (
+    ("lawSuitList", "legal_lawsuits", _LAWSUIT_FIELDS, "legal lawsuits"),
+    ("ktAnnouncementList", "court_hearing_announcements", _KT_ANNOUNCEMENT_FIELDS, "court hearing announcements"),
+    ("zhixingList", "executed_persons", _ZHIXING_FIELDS, "executed person records"),
+    ("courtAnnouncementList", "court_announcements", _format_court_announcement, "court announcements"),
+    ("courtRegisterList", "case_filing_information", _format_court_register, "case filing records"),
+    ("sendAnnouncementList", "service_announcements", _format_send_announcement, "service announcements"),
+    ("dishonestList", "dishonest_persons", _DISHONEST_FIELDS, "dishonest person records")
+)
+
+
 class TianyanchaJudicialRiskTool(Tool):
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
         """
@@ -16,10 +180,10 @@ class TianyanchaJudicialRiskTool(Tool):
                 - company_keyword: Company keyword (name or ID)
         """
         # Get parameters
-        company_keyword = tool_parameters.get("company_keyword")
+        company_keyword = (tool_parameters.get("company_keyword") or "").strip()
         
-        if not company_keyword:
-            error_message = "Company keyword cannot be empty"
+        error_message = keyword_error(company_keyword)
+        if error_message:
             yield self.create_json_message({"error": error_message})
             return
             
@@ -33,170 +197,13 @@ class TianyanchaJudicialRiskTool(Tool):
         
         # Call API to get judicial risk information
         try:
-            result = self._get_company_judicial_risk(company_keyword, token)
+            result = get_company_judicial_risk(company_keyword, token)
             
             # Return only structured JSON data
             yield self.create_json_message(result)
+        except Timeout:
+            error_message = "Tianyancha API request timed out, please try again later"
+            yield self.create_json_message({"error": error_message})
         except Exception as e:
             error_message = f"Error occurred during request: {str(e)}"
             yield self.create_json_message({"error": error_message})
-        
-    def _get_company_judicial_risk(self, company_keyword: str, token: str) -> dict:
-        """
-        API call implementation for getting enterprise judicial risk information
-        
-        Parameters:
-            company_keyword: Company keyword
-            token: API credentials
-            
-        Returns:
-            Formatted enterprise judicial risk information
-        """
-        # Build request
-        url = f"http://open.api.tianyancha.com/services/open/cb/judicial/2.0?keyword={company_keyword}"
-        headers = {'Authorization': token}
-        
-        # Send request
-        response = requests.get(url, headers=headers)
-        
-        # Check response status
-        if response.status_code != 200:
-            raise Exception(f"API request failed, status code: {response.status_code}, response: {response.text}")
-            
-        # Parse JSON response
-        response_data = response.json()
-        
-        # Check API return status
-        if response_data.get("error_code") != 0:
-            error_msg = response_data.get("reason", "Unknown error")
-            raise Exception(f"Query failed: {error_msg}")
-            
-        # Extract judicial risk information
-        judicial_data = response_data.get("result", {})
-        
-        # Build formatted information
-        result = {"judicial_risk": {}}
-        
-        # Legal lawsuits
-        lawsuit_list = judicial_data.get("lawSuitList", [])
-        if lawsuit_list:
-            result["judicial_risk"]["legal_lawsuits"] = [self._format_lawsuit(item) for item in lawsuit_list]
-        
-        # Court hearing announcements
-        kt_announcement_list = judicial_data.get("ktAnnouncementList", [])
-        if kt_announcement_list:
-            result["judicial_risk"]["court_hearing_announcements"] = [self._format_kt_announcement(item) for item in kt_announcement_list]
-        
-        # Executed persons
-        zhixing_list = judicial_data.get("zhixingList", [])
-        if zhixing_list:
-            result["judicial_risk"]["executed_persons"] = [self._format_zhixing(item) for item in zhixing_list]
-        
-        # Court announcements
-        court_announcement_list = judicial_data.get("courtAnnouncementList", [])
-        if court_announcement_list:
-            result["judicial_risk"]["court_announcements"] = [self._format_court_announcement(item) for item in court_announcement_list]
-        
-        # Case filing information
-        court_register_list = judicial_data.get("courtRegisterList", [])
-        if court_register_list:
-            result["judicial_risk"]["case_filing_information"] = [self._format_court_register(item) for item in court_register_list]
-        
-        # Service announcements
-        send_announcement_list = judicial_data.get("sendAnnouncementList", [])
-        if send_announcement_list:
-            result["judicial_risk"]["service_announcements"] = [self._format_send_announcement(item) for item in send_announcement_list]
-        
-        # Dishonest persons
-        dishonest_list = judicial_data.get("dishonestList", [])
-        if dishonest_list:
-            result["judicial_risk"]["dishonest_persons"] = [self._format_dishonest(item) for item in dishonest_list]
-        
-        # If no judicial risk data
-        if not result["judicial_risk"]:
-            result["judicial_risk"] = "No judicial risk information found for this enterprise"
-            
-        return result
-    
-    def _format_lawsuit(self, item: dict) -> dict:
-        """Format legal lawsuit information"""
-        return {
-            "case_number": item.get("caseno"),
-            "case_title": item.get("title"),
-            "case_reason": item.get("casereason"),
-            "case_type": item.get("casetype"),
-            "court": item.get("court"),
-            "document_type": item.get("doctype"),
-            "submit_time": item.get("submittime"),
-            "judgment_time": item.get("judgetime"),
-            "plaintiffs": item.get("plaintiffs"),
-            "defendants": item.get("defendants"),
-            "lawsuit_url": item.get("lawsuitUrl")
-        }
-        
-    def _format_kt_announcement(self, item: dict) -> dict:
-        """Format court hearing announcement information"""
-        return {
-            "case_number": item.get("caseNo"),
-            "case_reason": item.get("caseReason"),
-            "court": item.get("court"),
-            "hearing_date": item.get("startDate"),
-            "courtroom": item.get("courtroom"),
-            "litigants": item.get("litigant")
-        }
-    
-    def _format_zhixing(self, item: dict) -> dict:
-        """Format executed person information"""
-        return {
-            "case_code": item.get("caseCode"),
-            "execution_court": item.get("execCourtName"),
-            "case_filing_time": item.get("caseCreateTime"),
-            "execution_amount": item.get("execMoney")
-        }
-    
-    def _format_court_announcement(self, item: dict) -> dict:
-        """Format court announcement information"""
-        return {
-            "case_number": item.get("caseno"),
-            "party_1": item.get("party1"),
-            "party_2": item.get("party2"),
-            "case_reason": item.get("reason"),
-            "court": item.get("courtcode"),
-            "announcement_type": item.get("bltntypename"),
-            "publish_date": item.get("publishdate"),
-            "content_summary": item.get("content")[:100] + "..." if len(item.get("content", "")) > 100 else item.get("content")
-        }
-    
-    def _format_court_register(self, item: dict) -> dict:
-        """Format case filing information"""
-        return {
-            "case_number": item.get("caseNo"),
-            "filing_date": item.get("filingDate"),
-            "court": item.get("court"),
-            "plaintiff": item.get("plaintiff"),
-            "defendant": item.get("defendant"),
-            "case_reason": item.get("caseReason") or "Not disclosed"
-        }
-    
-    def _format_send_announcement(self, item: dict) -> dict:
-        """Format service announcement information"""
-        return {
-            "title": item.get("title"),
-            "court": item.get("court"),
-            "announcement_date": item.get("startDate"),
-            "content_summary": item.get("content")[:100] + "..." if len(item.get("content", "")) > 100 else item.get("content")
-        }
-    
-    def _format_dishonest(self, item: dict) -> dict:
-        """Format dishonest person information"""
-        return {
-            "case_code": item.get("casecode"),
-            "dishonest_person_name": item.get("iname"),
-            "execution_court": item.get("courtname"),
-            "area": item.get("areaname"),
-            "filing_date": item.get("regdate"),
-            "publish_date": item.get("publishdate"),
-            "dishonest_behavior": item.get("disrupttypename"),
-            "performance_status": item.get("performance"),
-            "obligations": item.get("duty")
-        }
\ No newline at end of file
@@ -1,11 +1,85 @@
 from collections.abc import Generator
 from typing import Any
-import requests
-from datetime import datetime
+
+from requests.exceptions import Timeout
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from tools._cache import CACHE_TTL, cached
+from tools._format import field_table
+from tools._http import SNAKE_CASE_LABELS, call_api, fetch_all_pages, keyword_error, parse_paging
+
+_API_URL = "https://open.api.tianyancha.com/services/v4/open/publicNotice"
+
+# Field table of (output key, API key); the end date is patched after building
+_NOTICE_FIELDS = field_table(
+    ("bill_type", "billType"),
+    ("bill_number", "billNum"),
+    ("bill_amount", "billAmt"),
+    ("bill_start_date", "billBeginDt"),
+    ("bill_end_date", "billEndDt"),
+    ("urgent_type", "exigentType"),
+    ("publish_date", "publishDt"),
+    ("publish_organization", "publishOrgName"),
+    ("drawer_company_name", "drawCompanyName"),
+    ("drawer_company_id", "drawCompanyId"),
+    ("holder_company_name", "ownerCompanyName"),
+    ("holder_company_id", "ownerCompanyId"),
+    ("applicant_company_name", "applyCompanyName"),
+    ("applicant_company_id", "applyCompanyId"),
+    ("payment_bank", "payCompanyName"),
+    ("detailed_notice_content", "infoDetail")
+)
+
+
+def _format_notice(item: dict) -> dict:
+    """Format bill public notice information"""
+    entry = _NOTICE_FIELDS(item)
+    entry["bill_end_date"] = entry["bill_end_date"] or "Not disclosed"
+    return entry
+
+
+@cached(_API_URL, stale_ttl=CACHE_TTL)
+def get_company_public_notice(company_keyword: str, token: str, page_size: int = 20, page_num: int = 1) -> dict:
+    """
+    API call implementation for getting enterprise bill public notice information
+
+    Parameters:
+        company_keyword: Company keyword
+        token: API credentials
+        page_size: Page size
+        page_num: Page number
+
+    Returns:
+        Formatted enterprise bill public notice information
+    """
+    # Build request
+    params = {"keyword": company_keyword, "pageSize": page_size, "pageNum": page_num}
+
+    # Send request
+    notice_data = call_api(_API_URL, token, params)
+    items_list = notice_data.get("items", [])
+    total = notice_data.get("total", 0)
+
+    # Build formatted information
+    notice_info = list(map(_format_notice, items_list))
+
+    result = {
+        "public_notice": {
+            "total_records": total,
+            "current_page": page_num,
+            "page_size": page_size,
+            "notice_records": notice_info
+        }
+    }
+
+    if not notice_info:
+        result["public_notice"]["note"] = "No bill public notice information found for this enterprise"
+
+    return result
+
+
 class TianyanchaPublicNoticeTool(Tool):
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
         """
@@ -16,14 +90,21 @@ class TianyanchaPublicNoticeTool(Tool):
                 - company_keyword: Company keyword (name or ID)
                 - page_size: Page size, default 20
                 - page_num: Page number, default 1
+                - fetch_all: Whether to fetch all pages instead of page_num, default False
+                - no_cache: Whether to bypass cached results and query the API, default False
         """
         # Get parameters
-        company_keyword = tool_parameters.get("company_keyword")
-        page_size = tool_parameters.get("page_size", 20)
-        page_num = tool_parameters.get("page_num", 1)
+        company_keyword = (tool_parameters.get("company_keyword") or "").strip()
+        fetch_all = tool_parameters.get("fetch_all", False)
+        no_cache = tool_parameters.get("no_cache", False)
+        
+        error_message = keyword_error(company_keyword)
+        if error_message:
+            yield self.create_json_message({"error": error_message})
+            return
         
-        if not company_keyword:
-            error_message = "Company keyword cannot be empty"
+        page_size, page_num, error_message = parse_paging(tool_parameters)
+        if error_message:
             yield self.create_json_message({"error": error_message})
             return
             
@@ -37,84 +118,21 @@ class TianyanchaPublicNoticeTool(Tool):
         
         # Call API to get public notice information
         try:
-            result = self._get_company_public_notice(company_keyword, token, page_size, page_num)
+            # Bypass the result cache when fresh data is requested
+            query = get_company_public_notice.__wrapped__ if no_cache else get_company_public_notice
+            if fetch_all:
+                result = fetch_all_pages(
+                    query, company_keyword, token, page_size,
+                    "public_notice", "notice_records", SNAKE_CASE_LABELS
+                )
+            else:
+                result = query(company_keyword, token, page_size, page_num)
             
             # Return structured JSON data
             yield self.create_json_message(result)
+        except Timeout:
+            error_message = "Tianyancha API request timed out, please try again later"
+            yield self.create_json_message({"error": error_message})
         except Exception as e:
             error_message = f"Error occurred during request: {str(e)}"
             yield self.create_json_message({"error": error_message})
-    
-    def _get_company_public_notice(self, company_keyword: str, token: str, page_size: int = 20, page_num: int = 1) -> dict:
-        """
-        API call implementation for getting enterprise bill public notice information
-        
-        Parameters:
-            company_keyword: Company keyword
-            token: API credentials
-            page_size: Page size
-            page_num: Page number
-            
-        Returns:
-            Formatted enterprise bill public notice information
-        """
-        # Build request
-        url = f"http://open.api.tianyancha.com/services/v4/open/publicNotice?keyword={company_keyword}&pageSize={page_size}&pageNum={page_num}"
-        headers = {'Authorization': token}
-        
-        # Send request
-        response = requests.get(url, headers=headers)
-        
-        # Check response status
-        if response.status_code != 200:
-            raise Exception(f"API request failed, status code: {response.status_code}, response: {response.text}")
-            
-        # Parse JSON response
-        response_data = response.json()
-        
-        # Check API return status
-        if response_data.get("error_code") != 0:
-            error_msg = response_data.get("reason", "Unknown error")
-            raise Exception(f"Query failed: {error_msg}")
-            
-        # Extract public notice information
-        notice_data = response_data.get("result", {})
-        items_list = notice_data.get("items", [])
-        total = notice_data.get("total", 0)
-        
-        # Build formatted information
-        notice_info = []
-        for item in items_list:
-            notice_entry = {
-                "bill_type": item.get("billType"),
-                "bill_number": item.get("billNum"),
-                "bill_amount": item.get("billAmt"),
-                "bill_start_date": item.get("billBeginDt"),
-                "bill_end_date": item.get("billEndDt") or "Not disclosed",
-                "urgent_type": item.get("exigentType"),
-                "publish_date": item.get("publishDt"),
-                "publish_organization": item.get("publishOrgName"),
-                "drawer_company_name": item.get("drawCompanyName"),
-                "drawer_company_id": item.get("drawCompanyId"),
-                "holder_company_name": item.get("ownerCompanyName"),
-                "holder_company_id": item.get("ownerCompanyId"),
-                "applicant_company_name": item.get("applyCompanyName"),
-                "applicant_company_id": item.get("applyCompanyId"),
-                "payment_bank": item.get("payCompanyName"),
-                "detailed_notice_content": item.get("infoDetail")
-            }
-            notice_info.append(notice_entry)
-            
-        result = {
-            "public_notice": {
-                "total_records": total,
-                "current_page": page_num,
-                "page_size": page_size,
-                "notice_records": notice_info
-            }
-        }
-        
-        if not notice_info:
-            result["public_notice"]["note"] = "No bill public notice information found for this enterprise"
-            
-        return result
\ No newline at end of file